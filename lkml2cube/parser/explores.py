@@ -142,7 +142,7 @@ def generate_cube_views(cube_def, lookml_model, use_explores_name=False):
             }
 
             if "hidden" in explore:
-                view["public"] = not bool(explore["hidden"] == "yes")
+                view["public"] = explore["hidden"] != "yes"
 
             if "joins" not in explore or not explore["joins"]:
                 cube_def["views"].append(view)
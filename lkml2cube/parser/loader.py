@@ -1,13 +1,18 @@
 import glob
 import lkml
-import rich
+import rich.console
+import rich.table
 import yaml
 
+from os import makedirs
 from os.path import abspath, dirname, join
-from pathlib import Path
 
-visited_path = {}
 console = rich.console.Console()
+merge_keys = frozenset(("views", "explores"))
+include_keys = frozenset(("includes",))
+ignored_keys = frozenset(("connection",))
+supported_keys = merge_keys | include_keys
+cube_root_elements = ("cubes", "views")
 
 
 def update_namespace(namespace, new_file):
@@ -15,27 +20,30 @@ def update_namespace(namespace, new_file):
     if namespace is None:
         return new_file
     for key, value in new_file.items():
-        if key in namespace and key in ("views", "explores"):
-            namespace[key] = namespace[key] + new_file[key]
-        elif key in namespace and key in ("includes"):  # remove duplicates
-            namespace[key] = list(set(namespace[key] + new_file[key]))
-        elif key in ("views", "explores", "includes"):
-            namespace[key] = new_file[key]
-        elif key in ("connection"):
-            pass  # ignored keys
+        if key in namespace and key in merge_keys:
+            namespace[key] = namespace[key] + value
+        elif key in namespace and key in include_keys:  # remove duplicates
+            namespace[key] = list(set(namespace[key] + value))
+        elif key in supported_keys:
+            namespace[key] = value
+        elif key in ignored_keys:
+            pass
         else:
             console.print(f"Key not supported yet: {key}", style="bold red")
     return namespace
 
 
-def file_loader(file_path_input, rootdir_param, namespace=None):
+def file_loader(file_path_input, rootdir_param, namespace=None, visited=None):
 
+    if visited is None:
+        visited = set()
     file_paths = glob.glob(file_path_input)
     for file_path in file_paths:
-        if file_path in visited_path:
+        if file_path in visited:
             continue
-        visited_path[file_path] = True
-        lookml_model = lkml.load(open(file_path, "r"))
+        visited.add(file_path)
+        with open(file_path, "r", encoding="utf-8") as f:
+            lookml_model = lkml.load(f)
         if "includes" in lookml_model:
             for included_path in lookml_model["includes"]:
                 if (
@@ -50,7 +58,10 @@ def file_loader(file_path_input, rootdir_param, namespace=None):
                 if rootdir_param:
                     root_dir = rootdir_param
                 namespace = file_loader(
-                    join(root_dir, included_path), rootdir_param, namespace=namespace
+                    join(root_dir, included_path),
+                    rootdir_param,
+                    namespace=namespace,
+                    visited=visited,
                 )
         namespace = update_namespace(namespace, lookml_model)
     return namespace
@@ -63,73 +74,59 @@ def write_single_file(
     file_name: str = "my_cubes.yml",
 ):
 
-    f = open(join(outputdir, subdir, file_name), "w")
-    f.write(yaml.dump(cube_def, allow_unicode=True))
-    f.close()
+    file_path = join(outputdir, subdir, file_name)
+    with open(file_path, "w", encoding="utf-8") as f:
+        yaml.dump(cube_def, f, allow_unicode=True)
+    return file_path
 
 
 def write_files(cube_def, outputdir):
 
-    summary = {"cubes": [], "views": []}
-
     if not cube_def:
         raise Exception("No cube definition available")
 
-    for cube_root_element in ("cubes", "views"):
+    summary = {
+        cube_root_element: {"name": [], "path": []}
+        for cube_root_element in cube_root_elements
+    }
+
+    for cube_root_element in cube_root_elements:
 
         if cube_root_element in cube_def:
 
-            Path(join(outputdir, cube_root_element)).mkdir(parents=True, exist_ok=True)
+            makedirs(join(outputdir, cube_root_element), exist_ok=True)
 
-            if len(cube_def[cube_root_element]) == 1:
-                file_name = cube_def[cube_root_element][0]["name"] + ".yml"
-                write_single_file(
-                    cube_def=cube_def,
+            # An empty list is not expected but not invalid either
+            for cube_element in cube_def[cube_root_element]:
+                element_name = cube_element.get("name")
+                if not element_name:
+                    console.print(
+                        f"Skipping {cube_root_element} element without name",
+                        style="bold red",
+                    )
+                    continue
+                new_def = {cube_root_element: [cube_element]}
+                file_name = element_name + ".yml"
+                file_path = write_single_file(
+                    cube_def=new_def,
                     outputdir=outputdir,
                     subdir=cube_root_element,
                     file_name=file_name,
                 )
-                summary[cube_root_element].append(
-                    {
-                        "name": cube_def[cube_root_element][0]["name"],
-                        "path": str(
-                            Path(join(outputdir, cube_root_element, file_name))
-                        ),
-                    }
-                )
-
-            elif len(cube_def[cube_root_element]) > 1:
-                for cube_element in cube_def[cube_root_element]:
-                    new_def = {cube_root_element: [cube_element]}
-                    file_name = cube_element["name"] + ".yml"
-                    write_single_file(
-                        cube_def=new_def,
-                        outputdir=outputdir,
-                        subdir=cube_root_element,
-                        file_name=file_name,
-                    )
-                    summary[cube_root_element].append(
-                        {
-                            "name": cube_element["name"],
-                            "path": str(
-                                Path(join(outputdir, cube_root_element, file_name))
-                            ),
-                        }
-                    )
-            else:
-                # Empty 'cubes' definition
-                # not expected but not invalid
-                pass
+                summary[cube_root_element]["name"].append(element_name)
+                summary[cube_root_element]["path"].append(file_path)
 
     return summary
 
 
 def print_summary(summary):
-    for cube_root_element in ("cubes", "views"):
+    for cube_root_element in cube_root_elements:
+        rows = summary[cube_root_element]
+        if not rows["name"]:
+            continue
         table = rich.table.Table(title=f"Generated {cube_root_element}")
         table.add_column("Element Name", justify="right", style="cyan", no_wrap=True)
         table.add_column("Path", style="magenta")
-        for row in summary[cube_root_element]:
-            table.add_row(row["name"], row["path"])
-        if len(summary[cube_root_element]) > 0:
-            console.print(table)
+        for name, path in zip(rows["name"], rows["path"]):
+            table.add_row(name, path)
+        console.print(table)
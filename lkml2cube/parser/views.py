@@ -1,172 +1,238 @@
-import copy
-import traceback
-import rich
+import functools
+import rich.console
 
-from pprint import pformat
+from itertools import chain
 from lkml2cube.parser.types import type_map, literal_unicode
 
 console = rich.console.Console()
 
 
+@functools.lru_cache(maxsize=4096)
+def rpl_table(s):
+    if "${" not in s:
+        return s
+    return s.replace("${TABLE}", "{CUBE}").replace("${", "{")
+
+
+def merge_extended_views(view, view_index, merged_views, extending=()):
+    if view["name"] in merged_views:
+        return merged_views[view["name"]]
+    extending = (*extending, view["name"])
+    extended_views = chain.from_iterable(
+        view.get("extends", view.get("extends__all", []))
+    )
+    parent_views = []
+    for lkml_view in extended_views:
+        view_item = view_index.get(lkml_view)
+        if view_item is None:
+            console.print(f"View not found: {lkml_view}", style="bold red")
+        elif lkml_view in extending:
+            console.print(f"Circular extends: {lkml_view}", style="bold red")
+        else:
+            if "extends" in view_item or "extends__all" in view_item:
+                view_item = merge_extended_views(
+                    view_item, view_index, merged_views, extending
+                )
+            parent_views.append(view_item)
+    parent_views.append(view)
+
+    # MRO is left to right
+    view = dict(parent_views.pop(0))
+    while len(parent_views) > 0:
+        next_view = parent_views.pop(0)
+        merged = {
+            elements: next_view[elements] + view[elements]
+            for elements in (
+                "dimensions",
+                "filters",
+                "measures",
+                "dimension_groups",
+            )
+            if elements in next_view and elements in view
+        }
+        view.update(next_view)
+        view.update(merged)
+    merged_views[view["name"]] = view
+    return view
+
+
+def validate_view(view):
+    errors = []
+    if "name" not in view:
+        errors.append(f"View must have name property:\n {view}")
+    for measure in view.get("measures", []):
+        for property in ("name", "type"):
+            if property not in measure:
+                errors.append(f"Measure must have {property} property:\n {measure}")
+        measure_type = measure.get("type", "count")
+        if (
+            measure_type in type_map
+            and measure_type != "count"
+            and "sql" not in measure
+        ):
+            errors.append(f"Measure must have sql property:\n {measure}")
+    return errors
+
+
+def generate_cube(view, sets):
+    label = view.get("label", view.get("view_label", view["name"]))
+    cube = {
+        "name": view["name"],
+        "description": label,
+        "dimensions": [],
+        "measures": [],
+        "joins": [],
+    }
+
+    if "sql_table_name" in view:
+        cube["sql_table"] = view["sql_table_name"]
+    elif "derived_table" in view and "sql" in view["derived_table"]:
+        cube["sql"] = view["derived_table"]["sql"]
+
+    if "sql" in cube:
+        cube["sql"] = literal_unicode(rpl_table(cube["sql"]))
+
+    view_filters = view.get("filters", ())
+    dimensions = chain(
+        view.get("dimensions", ()),
+        view_filters,
+        view.get("dimension_groups", ()),
+    )
+    filters = {element["name"] for element in view_filters} if view_filters else ()
+    add_dimension = cube["dimensions"].append
+
+    for dimension in dimensions:
+        dimension_type = dimension.get("type")
+        if dimension_type is None:
+            # Defaults to string, cube needs a type.
+            dimension["type"] = dimension_type = "string"
+        # validate schema
+        skip_dim = False
+        cube_type = type_map.get(dimension_type)
+        if cube_type is None:
+            console.print(
+                f"Dimension type: {dimension_type} not implemented yet:\n {dimension}",
+                style="bold red",
+            )
+            skip_dim = True
+        if "sql" not in dimension or "name" not in dimension:
+            for property in ("sql", "name"):
+                if property not in dimension:
+                    console.print(
+                        f"Dimension must have {property} property:\n {dimension}",
+                        style="bold red",
+                    )
+            skip_dim = True
+        if skip_dim:
+            continue
+
+        cube_dimension = {
+            "name": dimension["name"],
+            "sql": rpl_table(dimension["sql"]),
+            "type": cube_type,
+        }
+
+        hidden = dimension.get("hidden")
+        if hidden is not None:
+            cube_dimension["public"] = hidden != "yes"
+
+        if dimension["name"] in filters:
+            cube_dimension["type"] = "boolean"
+
+        if dimension_type == "tier":
+            bins = dimension.get("bins", dimension.get("tiers"))
+            if not bins:
+                console.print(
+                    f"Dimension type: {dimension_type} requires tiers",
+                    style="bold red",
+                )
+                continue
+            if len(bins) < 2:
+                pass
+            else:
+                sql = cube_dimension["sql"]
+                tier_sql = ["CASE "]
+                for low, high in zip(bins, bins[1:]):
+                    tier_sql.append(
+                        f" WHEN {sql} >= {low} AND {sql} < {high} THEN {low} "
+                    )
+                tier_sql.append("ELSE NULL END")
+                cube_dimension["sql"] = "".join(tier_sql)
+        add_dimension(cube_dimension)
+
+    for measure in view.get("measures", []):
+        measure_type = measure["type"]
+        cube_type = type_map.get(measure_type)
+        if cube_type is None:
+            msg = f"Measure type: {measure_type} not implemented yet:\n# {measure}"
+            console.print(f"# {msg}", style="bold red")
+            continue
+
+        cube_measure = {
+            "name": measure["name"],
+            "type": cube_type,
+        }
+
+        hidden = measure.get("hidden")
+        if hidden is not None:
+            cube_measure["public"] = hidden != "yes"
+
+        if measure_type != "count":
+            cube_measure["sql"] = rpl_table(measure["sql"])
+        elif "drill_fields" in measure:
+            drill_members = []
+            for drill_field in measure["drill_fields"]:
+                if drill_field.endswith("*"):
+                    set_name = drill_field[:-1]
+                    set_fields = sets.get(set_name)
+                    if set_fields is None:
+                        console.print(f"set undefined {set_name}", style="bold red")
+                    else:
+                        drill_members.extend(set_fields)
+                else:
+                    drill_members.append(drill_field)
+            if drill_members:
+                cube_measure["drill_members"] = drill_members
+
+        cube["measures"].append(cube_measure)
+
+    return cube
+
+
 def parse_view(lookml_model, raise_when_views_not_present=True):
+    views = lookml_model.get("views")
+    if views is None:
+        if raise_when_views_not_present:
+            raise Exception(
+                f"The following object types are not implemented yet: {lookml_model.keys()}"
+            )
+        return {"cubes": []}
+
     cubes = []
     cube_def = {"cubes": cubes}
-    rpl_table = lambda s: s.replace("${TABLE}", "{CUBE}").replace("${", "{")
     sets = {}
+    view_index = {view["name"]: view for view in views if "name" in view}
+    merged_views = {}
 
-    if raise_when_views_not_present and "views" not in lookml_model:
-        raise Exception(
-            f"The following object types are not implemented yet: {lookml_model.keys()}"
-        )
-    elif "views" not in lookml_model:
-        return cube_def
-
-    for view in lookml_model["views"]:
+    for view in views:
         try:
             if "sets" in view:
                 for set in view["sets"]:
                     sets[set["name"]] = set["fields"]
 
-            label = view.get("label", view.get("view_label", view["name"]))
-            cube = {
-                "name": view["name"],
-                "description": label,
-                "dimensions": [],
-                "measures": [],
-                "joins": [],
-            }
-
             if "extends" in view or "extends__all" in view:
-                extended_views = view.get("extends", view.get("extends__all", []))
-                extended_views = [x for l in extended_views for x in l]
-                parent_views = []
-                for lkml_view in extended_views:
-                    found = False
-                    for view_item in lookml_model["views"]:
-                        if lkml_view == view_item["name"]:
-                            parent_views.append(view_item)
-                            found = True
-                    if not found:
-                        console.print(f"View not found: {lkml_view}", style="bold red")
-                parent_views.append(view)
-
-                # MRO is left to right
-                view = copy.deepcopy(parent_views.pop(0))
-                while len(parent_views) > 0:
-                    next_view = parent_views.pop(0)
-                    for elements in (
-                        "dimensions",
-                        "filters",
-                        "measures",
-                        "dimension_groups",
-                    ):
-                        if elements in next_view and elements in view:
-                            next_view[elements] = next_view[elements] + view[elements]
-                    view.update(next_view)
-
-            if "sql_table_name" in view:
-                cube["sql_table"] = view["sql_table_name"]
-            elif "derived_table" in view and "sql" in view["derived_table"]:
-                cube["sql"] = view["derived_table"]["sql"]
-
-            if "sql" in cube:
-                cube["sql"] = literal_unicode(rpl_table(cube["sql"]))
-
-            dimensions = (
-                view.get("dimensions", [])
-                + view.get("filters", [])
-                + view.get("dimension_groups", [])
-            )
-            filters = {element["name"]: True for element in view.get("filters", [])}
-
-            for dimension in dimensions:
-                if "type" not in dimension:
-                    # Defaults to string, cube needs a type.
-                    dimension["type"] = "string"
-                # validate schema
-                skip_dim = False
-                if dimension["type"] not in type_map:
-                    console.print(
-                        f'Dimension type: {dimension["type"]} not implemented yet:\n {dimension}',
-                        style="bold red",
-                    )
-                    skip_dim = True
-                for property in ("sql", "name"):
-                    if property not in dimension:
-                        console.print(
-                            f"Dimension must have {property} property:\n {dimension}",
-                            style="bold red",
-                        )
-                if skip_dim:
-                    continue
-
-                cube_dimension = {
-                    "name": dimension["name"],
-                    "sql": rpl_table(dimension["sql"]),
-                    "type": type_map[dimension["type"]],
-                }
-
-                if "hidden" in dimension:
-                    cube_dimension["public"] = not bool(dimension["hidden"] == "yes")
-
-                if dimension["name"] in filters:
-                    cube_dimension["type"] = "boolean"
-
-                if dimension["type"] == "tier":
-                    bins = dimension.get("bins", dimension.get("tiers"))
-                    if not bins:
-                        console.print(
-                            f'Dimension type: {dimension["type"]} requires tiers',
-                            style="bold red",
-                        )
-                        continue
-                    if len(bins) < 2:
-                        pass
-                    else:
-                        tier_sql = f"CASE "
-                        for i in range(0, len(bins) - 1):
-                            tier_sql += f" WHEN {cube_dimension['sql']} >= {bins[i]} AND {cube_dimension['sql']} < {bins[i + 1]} THEN {bins[i]} "
-                        tier_sql += "ELSE NULL END"
-                        cube_dimension["sql"] = tier_sql
-                cube["dimensions"].append(cube_dimension)
-
-            for measure in view.get("measures", []):
-                if measure["type"] not in type_map:
-                    msg = f'Measure type: {measure["type"]} not implemented yet:\n# {measure}'
-                    console.print(f"# {msg}", style="bold red")
-                    continue
-
-                cube_measure = {
-                    "name": measure["name"],
-                    "type": type_map[measure["type"]],
-                }
-
-                if "hidden" in measure:
-                    cube_measure["public"] = not bool(measure["hidden"] == "yes")
-
-                if measure["type"] != "count":
-                    cube_measure["sql"] = rpl_table(measure["sql"])
-                elif "drill_fields" in measure:
-                    drill_members = []
-                    for drill_field in measure["drill_fields"]:
-                        if "*" in drill_field:
-                            drill_field = drill_field.replace("*", "")
-                            if drill_field not in sets:
-                                console.print(
-                                    f"set undefined {drill_field}", style="bold red"
-                                )
-                            else:
-                                drill_members += sets[drill_field]
-                        else:
-                            drill_members.append(drill_field)
-                        cube_measure["drill_members"] = drill_members
-
-                cube["measures"].append(cube_measure)
-
-            cubes.append(cube)
-        except Exception:
+                view = merge_extended_views(view, view_index, merged_views)
+
+            errors = validate_view(view)
+            if errors:
+                for error in errors:
+                    console.print(error, style="bold red")
+                continue
+
+            cubes.append(generate_cube(view, sets))
+        except (KeyError, TypeError) as e:
             console.print(
-                f"Error while parsing view: {pformat(view)}", style="bold red"
+                f"Error while parsing view {view.get('name', '?')}: {e!r}",
+                style="bold red",
             )
-            console.print(traceback.format_exc())
     return cube_def
@@ -0,0 +1,98 @@
+from lkml2cube.parser.views import parse_view
+
+
+def test_unsupported_measure_without_sql_is_skipped():
+    lookml_model = {
+        "views": [
+            {
+                "name": "orders",
+                "sql_table_name": "public.orders",
+                "dimensions": [{"name": "id", "type": "number", "sql": "${TABLE}.id"}],
+                "measures": [
+                    {"name": "p", "type": "percentile"},
+                    {"name": "total", "type": "sum", "sql": "${TABLE}.amount"},
+                ],
+            }
+        ]
+    }
+
+    cube_def = parse_view(lookml_model)
+
+    assert [cube["name"] for cube in cube_def["cubes"]] == ["orders"]
+    cube = cube_def["cubes"][0]
+    assert [d["name"] for d in cube["dimensions"]] == ["id"]
+    assert [m["name"] for m in cube["measures"]] == ["total"]
+
+
+def test_supported_measure_without_sql_skips_view():
+    lookml_model = {
+        "views": [
+            {
+                "name": "orders",
+                "sql_table_name": "public.orders",
+                "measures": [{"name": "total", "type": "sum"}],
+            }
+        ]
+    }
+
+    assert parse_view(lookml_model) == {"cubes": []}
+
+
+def test_multi_level_extends_inherits_from_all_ancestors():
+    lookml_model = {
+        "views": [
+            {
+                "name": "grandchild",
+                "extends__all": [["child"]],
+                "dimensions": [{"name": "gc", "sql": "${TABLE}.gc"}],
+            },
+            {
+                "name": "child",
+                "extends__all": [["base"]],
+                "dimensions": [{"name": "extra", "sql": "${TABLE}.extra"}],
+            },
+            {
+                "name": "base",
+                "sql_table_name": "public.base",
+                "dimensions": [{"name": "id", "type": "number", "sql": "${TABLE}.id"}],
+            },
+        ]
+    }
+
+    cube_def = parse_view(lookml_model)
+
+    dimensions = {
+        cube["name"]: [d["name"] for d in cube["dimensions"]]
+        for cube in cube_def["cubes"]
+    }
+    assert dimensions == {
+        "grandchild": ["gc", "extra", "id"],
+        "child": ["extra", "id"],
+        "base": ["id"],
+    }
+    assert all(cube["sql_table"] == "public.base" for cube in cube_def["cubes"])
+    # The loaded model is left untouched
+    assert [d["name"] for d in lookml_model["views"][1]["dimensions"]] == ["extra"]
+
+
+def test_circular_extends_does_not_recurse_forever():
+    lookml_model = {
+        "views": [
+            {
+                "name": "a",
+                "extends__all": [["b"]],
+                "sql_table_name": "a",
+                "dimensions": [{"name": "a_id", "sql": "${TABLE}.id"}],
+            },
+            {
+                "name": "b",
+                "extends__all": [["a"]],
+                "sql_table_name": "b",
+                "dimensions": [{"name": "b_id", "sql": "${TABLE}.id"}],
+            },
+        ]
+    }
+
+    cube_def = parse_view(lookml_model)
+
+    assert [cube["name"] for cube in cube_def["cubes"]] == ["a", "b"]